@@ -0,0 +1,145 @@
+# Bitemporal store of forecast revisions. Each row is one version of a slot's
+# forecast and generation mix, keyed by the slot start and the time it was
+# first fetched. A new row is only written when the values differ from the
+# slot's latest stored version; polls that see no change just move that
+# version's last_seen_at forward, so we know how long it stayed current.
+import json
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+REVISIONS_FILENAME = Path(__file__).parent / 'data/carbon_revisions.sqlite'
+
+def init_revision_store(filename):
+    conn = sqlite3.connect(filename, timeout=30)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS revisions (
+            slot INTEGER NOT NULL,
+            fetched_at INTEGER NOT NULL,
+            last_seen_at INTEGER NOT NULL,
+            forecast INTEGER,
+            intensity_index TEXT,
+            mix TEXT,
+            PRIMARY KEY (slot, fetched_at)
+        ) WITHOUT ROWID
+    ''')
+    return conn
+
+# Latest stored version of each slot in [first_slot, last_slot] fetched no later than as_of
+_LATEST_REVISIONS_SQL = '''
+    SELECT r.slot, r.fetched_at, r.forecast, r.intensity_index, r.mix
+    FROM revisions r
+    JOIN (SELECT slot, MAX(fetched_at) AS fetched_at FROM revisions
+          WHERE slot BETWEEN ? AND ? AND fetched_at <= ?
+          GROUP BY slot) latest USING (slot, fetched_at)
+    ORDER BY r.slot
+'''
+
+def _to_epoch(timestamp):
+    return int(pd.Timestamp(timestamp).timestamp())
+
+# Record the entries of one API response. Changed slots get a new version;
+# unchanged slots have their latest version marked as seen again.
+def record_forecast_revisions(filename, entries, fetched_at):
+    if not entries:
+        return 0
+
+    rows = []
+    for entry in entries:
+        mix = {mix['fuel']: mix['perc'] for mix in entry.get('generationmix', [])}
+        rows.append((_to_epoch(entry['from']), entry['intensity']['forecast'],
+                     entry['intensity']['index'], json.dumps(mix, sort_keys=True)))
+
+    fetched_at = _to_epoch(fetched_at)
+    first_slot = min(row[0] for row in rows)
+    last_slot = max(row[0] for row in rows)
+
+    conn = init_revision_store(filename)
+    try:
+        with conn:
+            latest = {slot: (version_fetched_at, (forecast, intensity_index, mix))
+                      for slot, version_fetched_at, forecast, intensity_index, mix
+                      in conn.execute(_LATEST_REVISIONS_SQL, (first_slot, last_slot, fetched_at))}
+            changed = []
+            unchanged = []
+            for slot, forecast, intensity_index, mix in rows:
+                version_fetched_at, values = latest.get(slot, (None, None))
+                if values == (forecast, intensity_index, mix):
+                    unchanged.append((fetched_at, slot, version_fetched_at))
+                else:
+                    changed.append((slot, fetched_at, fetched_at, forecast, intensity_index, mix))
+            conn.executemany('''
+                UPDATE revisions SET last_seen_at = MAX(last_seen_at, ?)
+                WHERE slot = ? AND fetched_at = ?
+            ''', unchanged)
+            conn.executemany('INSERT OR REPLACE INTO revisions VALUES (?, ?, ?, ?, ?, ?)', changed)
+    finally:
+        conn.close()
+    return len(changed)
+
+# What we believed at time as_of about the slots between start and end
+def get_forecasts_as_of(filename, as_of, start, end):
+    if not Path(filename).exists():
+        return pd.DataFrame(columns=['from', 'fetched_at', 'forecast', 'index'])
+
+    conn = init_revision_store(filename)
+    try:
+        df = pd.read_sql_query(_LATEST_REVISIONS_SQL, conn,
+                               params=(_to_epoch(start), _to_epoch(end), _to_epoch(as_of)))
+    finally:
+        conn.close()
+
+    mix_df = pd.DataFrame([json.loads(mix) for mix in df['mix']], index=df.index)
+    df = df.drop(columns='mix').rename(columns={'slot': 'from', 'intensity_index': 'index'})
+    df['from'] = pd.to_datetime(df['from'], unit='s', utc=True)
+    df['fetched_at'] = pd.to_datetime(df['fetched_at'], unit='s', utc=True)
+    return pd.concat([df, mix_df], axis=1)
+
+# Forecast error by lead time for slots between start and end.
+#
+# A slot's outturn is its latest version, provided that version was still
+# being seen once the slot had started. For each lead time L (in hours) the
+# forecast compared against it is the version that was current at slot - L:
+# the latest version fetched by then, as long as it had been seen again no
+# more than max_gap_seconds before slot - L (otherwise we weren't polling
+# and don't know what was believed, so the sample is skipped).
+def get_forecast_error_by_lead_time(filename, start, end, max_lead_hours=48, max_gap_seconds=1800):
+    if not Path(filename).exists():
+        return pd.DataFrame(columns=['lead_hours', 'samples', 'mean_error', 'mean_abs_error'])
+
+    conn = init_revision_store(filename)
+    try:
+        return pd.read_sql_query('''
+            WITH RECURSIVE leads(lead_hours) AS (
+                SELECT 1
+                UNION ALL
+                SELECT lead_hours + 1 FROM leads WHERE lead_hours < ?
+            ),
+            outturn AS (
+                SELECT r.slot, r.forecast
+                FROM revisions r
+                JOIN (SELECT slot, MAX(fetched_at) AS fetched_at FROM revisions
+                      WHERE slot BETWEEN ? AND ?
+                      GROUP BY slot) latest USING (slot, fetched_at)
+                WHERE r.last_seen_at >= r.slot
+            ),
+            believed AS (
+                SELECT l.lead_hours, o.slot, o.forecast AS outturn, o.slot - l.lead_hours * 3600 AS believed_at,
+                       (SELECT MAX(r.fetched_at) FROM revisions r
+                        WHERE r.slot = o.slot AND r.fetched_at <= o.slot - l.lead_hours * 3600) AS fetched_at
+                FROM outturn o
+                CROSS JOIN leads l
+            )
+            SELECT b.lead_hours,
+                   COUNT(*) AS samples,
+                   AVG(r.forecast - b.outturn) AS mean_error,
+                   AVG(ABS(r.forecast - b.outturn)) AS mean_abs_error
+            FROM believed b
+            JOIN revisions r ON r.slot = b.slot AND r.fetched_at = b.fetched_at
+            WHERE r.last_seen_at >= b.believed_at - ?
+            GROUP BY b.lead_hours
+            ORDER BY b.lead_hours
+        ''', conn, params=(max_lead_hours, _to_epoch(start), _to_epoch(end), max_gap_seconds))
+    finally:
+        conn.close()
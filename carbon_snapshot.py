@@ -0,0 +1,119 @@
+# Arrow snapshot of data/carbon.csv, memory-mapped by the app on cold start
+# instead of parsing the CSV.
+#
+# New slots are appended as small segment files next to the snapshot
+# (data/carbon.arrow.d/) rather than rewriting it. The app compacts after each
+# append, folding them back into the main file once there are more than
+# SNAPSHOT_MAX_SEGMENTS of them.
+#
+# Build it ahead of time (e.g. in a container build step) with:
+#     python carbon_snapshot.py
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+DATA_FILENAME = Path(__file__).parent / 'data/carbon.csv'
+SNAPSHOT_FILENAME = Path(__file__).parent / 'data/carbon.arrow'
+SNAPSHOT_MAX_SEGMENTS = 20
+
+# Directory holding the segments appended to a snapshot, oldest first by name
+def get_segments_dirname(snapshot_filename):
+    return snapshot_filename.with_name(snapshot_filename.name + '.d')
+
+def get_segment_filenames(snapshot_filename):
+    return sorted(get_segments_dirname(snapshot_filename).glob('*.arrow'))
+
+# Check whether the Arrow snapshot is at least as new as the CSV it was built from
+def snapshot_is_fresh(snapshot_filename, csv_filename):
+    if not snapshot_filename.exists():
+        return False
+    if not csv_filename.exists():
+        return True
+    snapshot_mtime = max(filename.stat().st_mtime
+                         for filename in [snapshot_filename] + get_segment_filenames(snapshot_filename))
+    return snapshot_mtime >= csv_filename.stat().st_mtime
+
+# Open the memory-mapped Arrow snapshot (no text parsing and no copy into memory).
+# Segments hold newer slots, so they go first to keep the table newest first.
+def load_carbon_snapshot(filename):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    tables = [feather.read_table(segment_filename, memory_map=True)
+              for segment_filename in reversed(get_segment_filenames(filename))]
+    tables.append(feather.read_table(filename, memory_map=True))
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options='permissive')
+
+# Write a DataFrame or Arrow table as an uncompressed Arrow IPC file so it can be memory-mapped
+def _write_arrow_file(data, filename):
+    import pyarrow.feather as feather
+    if isinstance(data, pd.DataFrame):
+        data = data.reset_index(drop=True)
+    # Write to a unique temporary file first so readers never see a partial
+    # file and concurrent writers never share a temporary path
+    fd, tmp_filename = tempfile.mkstemp(dir=Path(filename).parent, prefix=Path(filename).name, suffix='.tmp')
+    os.close(fd)
+    try:
+        feather.write_feather(data, tmp_filename, compression='uncompressed')
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
+
+# Replace the whole snapshot, dropping any appended segments
+def write_carbon_snapshot(data, filename):
+    try:
+        _write_arrow_file(data, filename)
+        for segment_filename in get_segment_filenames(filename):
+            segment_filename.unlink()
+    except Exception as e:
+        print(f'Could not write snapshot {filename}: {e}')
+
+# Append new rows to the snapshot as a segment file, without rewriting the snapshot
+def append_carbon_snapshot(df, filename):
+    try:
+        segments_dirname = get_segments_dirname(filename)
+        segments_dirname.mkdir(exist_ok=True)
+        _write_arrow_file(df.sort_values(by='from', ascending=False),
+                          segments_dirname / f'{time.time_ns():020d}.arrow')
+    except Exception as e:
+        print(f'Could not append to snapshot {filename}: {e}')
+
+# Fold the appended segments back into the main snapshot file once there are too many
+def compact_carbon_snapshot(filename, max_segments=SNAPSHOT_MAX_SEGMENTS):
+    if len(get_segment_filenames(filename)) > max_segments:
+        write_carbon_snapshot(load_carbon_snapshot(filename), filename)
+
+# Parse the CSV into a DataFrame with UTC timestamps
+def read_carbon_csv(filename):
+    if filename.exists():
+        # raw_carbon_df = pd.read_csv(DATA_FILENAME, parse_dates=['from', 'to'], infer_datetime_format=True)
+        raw_carbon_df = pd.read_csv(filename, parse_dates=['from', 'to'])
+        raw_carbon_df['from'] = pd.to_datetime(raw_carbon_df['from'], utc=True)
+        raw_carbon_df['to'] = pd.to_datetime(raw_carbon_df['to'], utc=True)
+    else:
+        raw_carbon_df = pd.DataFrame(columns=['from', 'to', 'forecast', 'index'])
+    
+    try: 
+        raw_carbon_df = raw_carbon_df.drop('Unnammed:0', axis=1)
+    except:
+        print(raw_carbon_df.columns)
+    return raw_carbon_df
+
+# Parse the CSV and write it as a snapshot, newest slot first
+def build_carbon_snapshot(csv_filename, snapshot_filename):
+    raw_carbon_df = read_carbon_csv(csv_filename).sort_values(by='from', ascending=False)
+    if csv_filename.exists():
+        write_carbon_snapshot(raw_carbon_df, snapshot_filename)
+    return raw_carbon_df
+
+if __name__ == '__main__':
+    if not DATA_FILENAME.exists():
+        print(f'No data at {DATA_FILENAME}, nothing to build')
+    else:
+        carbon_df = build_carbon_snapshot(DATA_FILENAME, SNAPSHOT_FILENAME)
+        print(f'Wrote {len(carbon_df)} rows to {SNAPSHOT_FILENAME}')
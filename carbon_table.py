@@ -0,0 +1,83 @@
+# Helpers for working with the newest-first dataset frame: range slices, the
+# paginated date range table, per-session memory estimates and chunked exports.
+import tempfile
+
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_MIN_CHUNK_ROWS = 1_000
+
+# Rows of a newest-first frame with 'from' between start and end, as a slice
+# of the shared frame rather than a filtered copy
+def get_range_slice(df, start, end):
+    ascending_from = df['from'].iloc[::-1]
+    first = ascending_from.searchsorted(pd.Timestamp(start).tz_convert('UTC'), side='left')
+    last = ascending_from.searchsorted(pd.Timestamp(end).tz_convert('UTC'), side='right')
+    return df.iloc[len(df) - last:len(df) - first]
+
+# Memory held by frames built for this session only; the shared frame is not counted
+def get_session_memory_bytes(frames):
+    return int(sum(df.memory_usage(index=True, deep=True).sum() for df in frames))
+
+# Rough size of one row of a frame, counting object columns as one pointer each
+def estimate_row_bytes(df):
+    return max(1, int(df.memory_usage(index=True, deep=False).sum() / max(len(df), 1)))
+
+# Memory get_table_page needs on top of the frame: a sorted copy of the sort
+# column and its index. Sorting by 'from' uses the frame's own order instead.
+def estimate_table_sort_bytes(df, sort_column):
+    if sort_column == 'from':
+        return 0
+    return int(df[sort_column].memory_usage(index=False, deep=False)) + len(df) * 8
+
+# The column to sort the table by within available_bytes, and what the sort
+# needs. Falls back to 'from', which costs nothing, when over budget.
+def fit_table_sort(df, sort_column, available_bytes):
+    sort_bytes = estimate_table_sort_bytes(df, sort_column)
+    if sort_bytes > available_bytes:
+        return 'from', 0
+    return sort_column, sort_bytes
+
+# Export chunk size that fits in available_bytes, within the configured limits
+def get_export_chunk_rows(df, available_bytes):
+    return int(max(EXPORT_MIN_CHUNK_ROWS, min(EXPORT_CHUNK_ROWS, available_bytes // estimate_row_bytes(df))))
+
+# Return one page of the frame sorted by a column, without sorting the whole frame.
+# Only the sort column is ordered; the page rows are then picked by position.
+def get_table_page(df, sort_column, ascending, page, page_size):
+    start = (page - 1) * page_size
+    if sort_column == 'from':
+        # The shared frame is already newest first, so a page is just a slice
+        ordered_df = df.iloc[::-1] if ascending else df
+        return ordered_df.iloc[start:start + page_size]
+
+    order = df[sort_column].reset_index(drop=True).sort_values(ascending=ascending, kind='stable', na_position='last')
+    return df.iloc[order.index[start:start + page_size]]
+
+# Write the frame to a CSV or Parquet file in dirname one chunk at a time,
+# so a large export never needs a second in-memory copy of the data
+def write_export_file(df, file_format, dirname, chunk_rows=EXPORT_CHUNK_ROWS):
+    dirname.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(prefix='carbon_export_', suffix=f'.{file_format}', dir=dirname, delete=False)
+    tmp.close()
+    starts = range(0, max(len(df), 1), chunk_rows)
+
+    if file_format == 'csv':
+        for start in starts:
+            df.iloc[start:start + chunk_rows].to_csv(tmp.name, mode='w' if start == 0 else 'a',
+                                                     header=start == 0, index=False)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for start in starts:
+            chunk = df.iloc[start:start + chunk_rows]
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(tmp.name, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+        writer.close()
+
+    return tmp.name
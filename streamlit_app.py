@@ -1,37 +1,131 @@
+import time
+_APP_START = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-from pathlib import Path
-import pytz
-from datetime import datetime, timedelta
-import requests
-import altair as alt
 
 # Set the title and favicon for the browser tab
 st.set_page_config(page_title='Sunderland Carbon Intensity', page_icon=':earth_africa:')
 
-# Function to load and process Carbon Intensity data
-@st.cache_data
-def get_carbon_data():
-    DATA_FILENAME = Path(__file__).parent / 'data/carbon.csv'
-    if DATA_FILENAME.exists():
-        # raw_carbon_df = pd.read_csv(DATA_FILENAME, parse_dates=['from', 'to'], infer_datetime_format=True)
-        raw_carbon_df = pd.read_csv(DATA_FILENAME, parse_dates=['from', 'to'])
-        raw_carbon_df['from'] = pd.to_datetime(raw_carbon_df['from'], utc=True)
-        raw_carbon_df['to'] = pd.to_datetime(raw_carbon_df['to'], utc=True)
-    else:
-        raw_carbon_df = pd.DataFrame(columns=['from', 'to', 'forecast', 'index'])
-    
-    try: 
-        raw_carbon_df = raw_carbon_df.drop('Unnammed:0', axis=1)
-    except:
-        print(raw_carbon_df.columns)
-    return raw_carbon_df
+# Dashboard title and introduction, drawn before pandas, the data modules or
+# any data are loaded
+st.title(':earth_africa: Sunderland Carbon Intensity Dashboard')
+_FIRST_PAINT_SECONDS = time.perf_counter() - _APP_START
+
+import math
+import os
+import threading
+import weakref
+import pandas as pd
+import pytz
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from carbon_revisions import (REVISIONS_FILENAME, get_forecast_error_by_lead_time, get_forecasts_as_of,
+                               record_forecast_revisions)
+from carbon_snapshot import (DATA_FILENAME, SNAPSHOT_FILENAME, append_carbon_snapshot, build_carbon_snapshot,
+                             compact_carbon_snapshot, load_carbon_snapshot, read_carbon_csv, snapshot_is_fresh)
+from carbon_table import (estimate_row_bytes, fit_table_sort, get_export_chunk_rows, get_range_slice,
+                          get_session_memory_bytes, get_table_page, write_export_file)
+
+# Slices and derived frames never write through to the shared dataset.
+# Copy-on-write is always on from pandas 3, where the option is deprecated.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# altair, requests and pyarrow are imported inside the functions and sections
+# that use them so they don't delay the rest of the page either
+_IMPORT_SECONDS = time.perf_counter() - _APP_START
+
+
+# Fast start mode reads the prebuilt Arrow snapshot instead of parsing the CSV.
+# Set CARBON_FAST_START=0 to always parse the CSV.
+FAST_START = os.environ.get('CARBON_FAST_START', '1') != '0'
+
+# Background refresh settings: how often the refresh loop checks for a gap, how often
+# open pages poll for new data, how many slots to save per batch, and the
+# minimum gap between telling open pages to reload during a long catch-up
+REFRESH_INTERVAL_SECONDS = 300
+REFRESH_POLL_SECONDS = 10
+REFRESH_FLUSH_RECORDS = 48 * 7
+REFRESH_PUBLISH_SECONDS = 60
+
+# Forecast revision polling: how often recent and future slots are re-fetched,
+# and how far back and ahead of now each poll reaches
+REVISION_POLL_SECONDS = 1800
+REVISION_LOOKBACK = timedelta(hours=24)
+REVISION_LOOKAHEAD = timedelta(hours=48)
+
+# Date range table and export settings
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# Exports are written under Streamlit's static folder and downloaded straight
+# from disk (enableStaticServing in .streamlit/config.toml). Files left behind
+# by sessions that ended abnormally are removed after EXPORT_MAX_AGE_SECONDS.
+EXPORTS_DIRNAME = Path(__file__).parent / 'static/exports'
+EXPORTS_URL = 'app/static/exports'
+EXPORT_MAX_AGE_SECONDS = 3600
+
+# Per-session memory budget for frames built on top of the shared dataset
+SESSION_MEMORY_BUDGET_MB = int(os.environ.get('CARBON_SESSION_MEMORY_MB', '64'))
+
+# Cold start timings. Later reruns find everything already imported and
+# loaded, so only the first run of this process is kept and reported.
+@st.cache_resource
+def get_startup_timings():
+    return {'imports': _IMPORT_SECONDS, 'first_paint': _FIRST_PAINT_SECONDS}
+
+startup_timings = get_startup_timings()
+
+# Immutable Arrow table of the whole dataset, shared by every session.
+# Keyed on the refresher's data version so a save replaces the old table.
+# Holds the refresher's lock so a rebuild never races with a save.
+@st.cache_resource(max_entries=1)
+def get_carbon_table(version):
+    with get_data_refresher().lock:
+        if FAST_START and snapshot_is_fresh(SNAPSHOT_FILENAME, DATA_FILENAME):
+            try:
+                return load_carbon_snapshot(SNAPSHOT_FILENAME)
+            except Exception as e:
+                print(f'Could not read snapshot {SNAPSHOT_FILENAME}: {e}')
+
+        if not FAST_START:
+            raw_carbon_df = read_carbon_csv(DATA_FILENAME).sort_values(by='from', ascending=False)
+        else:
+            raw_carbon_df = build_carbon_snapshot(DATA_FILENAME, SNAPSHOT_FILENAME)
+        if FAST_START and DATA_FILENAME.exists():
+            try:
+                return load_carbon_snapshot(SNAPSHOT_FILENAME)
+            except Exception as e:
+                print(f'Could not read snapshot {SNAPSHOT_FILENAME}: {e}')
+
+    import pyarrow as pa
+    return pa.Table.from_pandas(raw_carbon_df, preserve_index=False)
+
+# Function to load and process Carbon Intensity data.
+# Returns one read-only DataFrame, sorted newest first, that all sessions share
+# without copying; never modify it in place (copy-on-write is enabled above).
+@st.cache_resource(max_entries=1)
+def get_carbon_data(version):
+    carbon_df = get_carbon_table(version).to_pandas(split_blocks=True)
+    carbon_df['from'] = pd.to_datetime(carbon_df['from'], utc=True)
+    carbon_df['to'] = pd.to_datetime(carbon_df['to'], utc=True)
+    if not carbon_df['from'].is_monotonic_decreasing:
+        carbon_df = carbon_df.sort_values(by='from', ascending=False, ignore_index=True)
+    return carbon_df
+
+# The last `days` of the shared frame with derived 'day' and 'hour' columns,
+# kept as a separate cached view that all sessions share
+@st.cache_resource(max_entries=1)
+def get_recent_calendar_view(version, days):
+    carbon_df = get_carbon_data(version)
+    max_from = carbon_df['from'].iloc[0]
+    recent_df = get_range_slice(carbon_df, max_from - pd.Timedelta(days=days), max_from)[['from', 'forecast']]
+    return recent_df.assign(day=recent_df['from'].dt.date, hour=recent_df['from'].dt.hour)
 
 # Function to get the last available timestamp from the DataFrame
 def get_last_timestamp_from_df(df, timestamp_column):
     if not df.empty:
-        df[timestamp_column] = pd.to_datetime(df[timestamp_column])
-        return df[timestamp_column].max()
+        return pd.to_datetime(df[timestamp_column], utc=True).max()
     else:
         return None
 
@@ -66,9 +160,11 @@ def categorize_intensity(forecast):
 
 # Fetch data from the Carbon Intensity API
 def fetch_data(start, end):
+    import requests
     headers = {'Accept': 'application/json'}
     url = f'https://api.carbonintensity.org.uk/regional/intensity/{start.strftime("%Y-%m-%dT%H:%MZ")}/{end.strftime("%Y-%m-%dT%H:%MZ")}/postcode/me4'
-    response = requests.get(url, headers=headers)
+    response = requests.get(url, headers=headers, timeout=30)
+    response.raise_for_status()
     return response.json()
 
 # Main function to generate date range for new data fetching
@@ -87,12 +183,13 @@ def generate_date_range_for_fetching(df, timestamp_column):
 # Append new data to the CSV file
 def append_new_data_to_csv(new_data, filename):
     if not new_data.empty:
-        new_data.to_csv(filename, mode='a', header=False, index=False)
+        new_data.to_csv(filename, mode='a', header=not Path(filename).exists(), index=False)
         
 # Find the lowest forecast values for today based on yesterday's data
 def get_lowest_forecast_periods(df):
+    # Only copy the last few days; the full frame is shared between sessions
+    df_local = df[df['from'] >= pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=3)].copy()
     # Convert UTC times to UK local time for proper day comparison
-    df_local = df.copy()
     df_local['local_time'] = df_local['from'].dt.tz_convert('Europe/London')
     df_local['date'] = df_local['local_time'].dt.date
     df_local['hour'] = df_local['local_time'].dt.hour
@@ -116,70 +213,247 @@ def get_lowest_forecast_periods(df):
     
     return lowest_periods
 
-# Load the Carbon Intensity data
-carbon_df = get_carbon_data()
-
-# Determine the date range for fetching new data
-start_date, end_date = generate_date_range_for_fetching(carbon_df, 'to')
-
-# Fetch new data only if there's a gap between the last available timestamp and the current time
-if start_date < end_date:
-    all_records = []
-    current_start = start_date
-    while current_start < end_date:
-        current_end = min(current_start + timedelta(days=1), end_date)  # Fetch data day by day
-        data = fetch_data(current_start, current_end)
-        try:
-            entries = data['data']['data']
-        except:
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# An export file owned by one session. The file is removed when the export is
+# replaced, or when the session ends and its state is garbage collected.
+class ExportFile:
+    def __init__(self, key, path):
+        self.key = key
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def remove(self):
+        self._finalizer()
+
+# Remove export files older than max_age_seconds
+def remove_stale_exports(dirname, max_age_seconds=EXPORT_MAX_AGE_SECONDS):
+    if dirname.exists():
+        for path in dirname.glob('carbon_export_*'):
+            if time.time() - path.stat().st_mtime > max_age_seconds:
+                _remove_file(path)
+
+# Turn the entries of one API response into flat records
+def records_from_entries(entries):
+    records = []
+    for entry in entries:
+        record = {
+            'from': entry['from'],
+            'to': entry['to'],
+            'forecast': entry['intensity']['forecast'],
+            'index': entry['intensity']['index'],
+        }
+        for mix in entry['generationmix']:
+            record[mix['fuel']] = mix['perc']
+        records.append(record)
+    return records
+
+# Background refresh of the local store, shared by every session. Once
+# started it runs on its own timer for the life of the server process, so
+# catching up and re-polling for forecast revisions carry on with no visitors.
+# The page renders from whatever is stored while this runs, and the status
+# fragment reruns the page whenever new data has been published.
+class DataRefresher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        # Frame holding the latest saved slot, used to work out what to fetch
+        # next. This is the shared dataset or the last saved batch, never a copy.
+        self.data = None
+        self.version = 0
+        self.busy = False
+        self.progress = 0.0
+        self.message = ''
+        # Latest problem with catching up and with polling for revisions, each
+        # cleared by the next run of the same kind that goes through cleanly
+        self.catch_up_error = None
+        self.revision_error = None
+        self.last_revision_poll = None
+        # Bumped whenever revisions are recorded, to key the cached revision queries
+        self.revision_version = 0
+        self.last_published = None
+        self.unpublished = False
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def error(self):
+        return self.catch_up_error or self.revision_error
+
+    # Start the refresh loop if it isn't already running
+    def start(self, df):
+        with self.lock:
+            if self.data is None:
+                self.data = df
+            if self.is_running():
+                return
+            self.thread = threading.Thread(target=self._loop, daemon=True)
+            self.thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self._run_due()
+            except Exception as e:
+                self.catch_up_error = f'Background refresh failed: {e}'
+                print(self.catch_up_error)
+            time.sleep(REFRESH_INTERVAL_SECONDS)
+
+    # Catch up if there is a gap, and re-poll recent and future slots for
+    # revisions if the last poll is old enough
+    def _run_due(self):
+        start_date, end_date = generate_date_range_for_fetching(self.data, 'to')
+        if start_date < end_date:
+            self.busy = True
+            self.progress = 0.0
+            self.message = f'Fetching data from {start_date:%Y-%m-%d %H:%M}'
+            try:
+                self._catch_up(start_date, end_date)
+            finally:
+                self.busy = False
+
+        now = time.monotonic()
+        if self.last_revision_poll is None or now - self.last_revision_poll >= REVISION_POLL_SECONDS:
+            self.last_revision_poll = now
+            self._poll_revisions()
+
+    def _catch_up(self, start_date, end_date):
+        total_days = max(1, math.ceil((end_date - start_date) / timedelta(days=1)))
+        error = None
+        pending = []
+        days_done = 0
+        current_start = start_date
+        while current_start < end_date:
+            current_end = min(current_start + timedelta(days=1), end_date)  # Fetch data day by day
+            try:
+                fetched_at = datetime.now(pytz.UTC)
+                entries = fetch_data(current_start, current_end)['data']['data']
+                pending.extend(records_from_entries(entries))
+                record_forecast_revisions(REVISIONS_FILENAME, entries, fetched_at)
+                self.revision_version += 1
+            except Exception as e:
+                error = self.catch_up_error = f'Could not fetch {current_start:%Y-%m-%d}: {e}'
+                print(error)
+
             current_start += timedelta(days=1)
-            continue
-
-        for entry in entries:
-            record = {
-                'from': entry['from'],
-                'to': entry['to'],
-                'forecast': entry['intensity']['forecast'],
-                'index': entry['intensity']['index'],
-            }
-            for mix in entry['generationmix']:
-                record[mix['fuel']] = mix['perc']
-            all_records.append(record)
-
-        current_start += timedelta(days=1)
-
-    # Convert list of records to DataFrame
-    if all_records:
-        new_data_df = pd.DataFrame(all_records)
+            days_done += 1
+            self.progress = min(1.0, days_done / total_days)
+            self.message = f'Fetched up to {min(current_start, end_date):%Y-%m-%d %H:%M}'
+
+            if pending and (len(pending) >= REFRESH_FLUSH_RECORDS or current_start >= end_date):
+                if not self._save(pending):
+                    error = self.catch_up_error
+                pending = []
+                self._publish()
+
+        self.catch_up_error = error
+        self._publish(force=True)
+        self.message = f'Up to date as of {end_date:%Y-%m-%d %H:%M}'
+
+    # Re-fetch recent and future slots so later forecast revisions are recorded
+    def _poll_revisions(self):
+        fetched_at = datetime.now(pytz.UTC)
+        try:
+            entries = fetch_data(fetched_at - REVISION_LOOKBACK, fetched_at + REVISION_LOOKAHEAD)['data']['data']
+            record_forecast_revisions(REVISIONS_FILENAME, entries, fetched_at)
+            self.revision_version += 1
+            self.revision_error = None
+        except Exception as e:
+            self.revision_error = f'Could not poll forecast revisions: {e}'
+            print(self.revision_error)
+
+    # Tell open pages to reload if new data was saved, at most once every
+    # REFRESH_PUBLISH_SECONDS unless forced at the end of a run
+    def _publish(self, force=False):
+        now = time.monotonic()
+        if not self.unpublished:
+            return
+        if force or self.last_published is None or now - self.last_published >= REFRESH_PUBLISH_SECONDS:
+            self.last_published = now
+            self.unpublished = False
+            self.version += 1
+
+    # Append a batch of new records to the CSV and snapshot, returning whether it worked
+    def _save(self, records):
+        new_data_df = pd.DataFrame(records)
         new_data_df['from'] = pd.to_datetime(new_data_df['from'], utc=True)
         new_data_df['to'] = pd.to_datetime(new_data_df['to'], utc=True)
 
-        # Append new data to the existing DataFrame and CSV
-        carbon_df = pd.concat([carbon_df, new_data_df], ignore_index=True)
-        try: 
-            carbon_df = carbon_df.drop('Unnammed:0', axis=1)
-        except:
-            print(carbon_df.columns)
-                  
-        append_new_data_to_csv(new_data_df, Path(__file__).parent / 'data/carbon.csv')
+        try:
+            with self.lock:
+                # A stale snapshot is rebuilt from the CSV on the next load instead
+                update_snapshot = FAST_START and snapshot_is_fresh(SNAPSHOT_FILENAME, DATA_FILENAME)
+                append_new_data_to_csv(new_data_df, DATA_FILENAME)
+                if update_snapshot:
+                    append_carbon_snapshot(new_data_df, SNAPSHOT_FILENAME)
+                    compact_carbon_snapshot(SNAPSHOT_FILENAME)
+                self.data = new_data_df
+                self.unpublished = True
+            return True
+        except Exception as e:
+            self.catch_up_error = f'Could not save new data: {e}'
+            print(self.catch_up_error)
+            return False
+
+@st.cache_resource
+def get_data_refresher():
+    return DataRefresher()
+
+# Revision queries, cached so reruns (page turns, sort changes) don't hit
+# SQLite again. Keyed on the refresher's revision_version, which changes
+# when new revisions are recorded, with a TTL as a backstop.
+@st.cache_data(ttl=REVISION_POLL_SECONDS)
+def get_cached_forecasts_as_of(as_of, revision_version):
+    return get_forecasts_as_of(REVISIONS_FILENAME, as_of, as_of, as_of + timedelta(hours=48))
+
+@st.cache_data(ttl=REVISION_POLL_SECONDS)
+def get_cached_forecast_error_by_lead_time(days, revision_version):
+    now = datetime.now(pytz.UTC)
+    return get_forecast_error_by_lead_time(REVISIONS_FILENAME, now - timedelta(days=days), now,
+                                           max_gap_seconds=REVISION_POLL_SECONDS)
+
+# Show how fresh the data is and the progress of any background refresh.
+# Runs on its own timer so open pages pick up new slots without interaction.
+@st.fragment(run_every=REFRESH_POLL_SECONDS)
+def show_data_status(data_as_of):
+    refresher = get_data_refresher()
+    if refresher.version != st.session_state.get('data_version'):
+        st.rerun()
+
+    if data_as_of is None:
+        st.caption('📡 No data stored yet')
+    else:
+        st.caption(f"📡 Data as of {data_as_of.tz_convert('Europe/London'):%d %b %Y %H:%M}")
+    if refresher.busy:
+        st.progress(refresher.progress, text=refresher.message)
+    if refresher.error:
+        st.warning(f'⚠️ {refresher.error}')
+
+# Load the Carbon Intensity data
+_load_start = time.perf_counter()
+refresher = get_data_refresher()
+st.session_state['data_version'] = refresher.version
+carbon_df = get_carbon_data(st.session_state['data_version'])
+startup_timings.setdefault('data_load', time.perf_counter() - _load_start)
 
-# Ensure 'from' column is in UTC and sort by time
-carbon_df['from'] = pd.to_datetime(carbon_df['from'], utc=True)
-carbon_df = carbon_df.sort_values(by='from', ascending=False)
+# Refresh in the background and render straight away from the stored data
+refresher.start(carbon_df)
+show_data_status(pd.to_datetime(carbon_df['to'], utc=True).max() if not carbon_df.empty else None)
 
-try: 
-    carbon_df = carbon_df.drop('Unnammed:0', axis=1)
-except:
-    print(carbon_df.columns)
+if carbon_df.empty:
+    st.info('⏳ Fetching carbon intensity data for the first time. The page will update as data arrives.')
+    st.stop()
 
 # Get the latest data
 latest_data = carbon_df.iloc[0]
 latest_forecast = float(latest_data['forecast'])
 latest_index = latest_data['index']
 
-# Dashboard title and introduction
-st.title(':earth_africa: Sunderland Carbon Intensity Dashboard')
-
 # --- Latest Carbon Intensity Section ---
 st.header('🔍 Latest Carbon Intensity')
 
@@ -239,19 +513,16 @@ uk_timezone = pytz.timezone('Europe/London')
 current_time = datetime.now(uk_timezone)
 time_window = current_time - pd.Timedelta(hours=48)
 
-recent_df = carbon_df[carbon_df['from'] >= time_window]
+recent_df = get_range_slice(carbon_df, time_window, carbon_df['from'].iloc[0])
 
 # Plot the line chart for recent carbon intensity
 st.line_chart(recent_df, x='from', y='forecast')
 
-# Add columns for 'day' and 'hour'
-carbon_df['day'] = carbon_df['from'].dt.date
-carbon_df['hour'] = carbon_df['from'].dt.hour
-
-# Filter the data for the last two weeks
-last_two_weeks = carbon_df[carbon_df['from'] >= (carbon_df['from'].max() - pd.Timedelta(days=14))]
+# The data for the last two weeks with 'day' and 'hour' columns
+last_two_weeks = get_recent_calendar_view(st.session_state['data_version'], 14)
 
 # Boxplot by Day using Altair (for the last 2 weeks)
+import altair as alt
 boxplot_day = alt.Chart(last_two_weeks).mark_boxplot().encode(
     x=alt.X('day:T', title='Day'),
     y=alt.Y('forecast:Q', title='Carbon Intensity (gCO₂/kWh)')
@@ -275,12 +546,37 @@ st.header('🕖 Carbon Intensity Forecast (gCO₂/kWh) by Hour - Last 2 Weeks')
 # Display hour-based boxplot in Streamlit
 st.altair_chart(boxplot_hour)
 
+# --- Forecast Revisions Section ---
+st.header('🕰️ Forecast Revisions')
+
+# Show the 48 hour forecast as it was believed at a chosen point in time
+col1, col2 = st.columns(2)
+default_as_of = (current_time - timedelta(hours=24)).replace(minute=0, second=0, microsecond=0)
+with col1:
+    as_of_date = st.date_input('As of date', value=default_as_of.date())
+with col2:
+    as_of_time = st.time_input('As of time', value=default_as_of.time())
+as_of = uk_timezone.localize(datetime.combine(as_of_date, as_of_time))
+
+believed_df = get_cached_forecasts_as_of(as_of, refresher.revision_version)
+if not believed_df.empty:
+    st.write(f"Forecast for the 48 hours after {as_of:%d %b %Y %H:%M}, as known at that time:")
+    st.line_chart(believed_df, x='from', y='forecast')
+else:
+    st.info('No forecast revisions recorded for that time yet.')
+
+# Forecast error by how far ahead the forecast was made, over the last 30 days
+error_df = get_cached_forecast_error_by_lead_time(30, refresher.revision_version)
+if not error_df.empty:
+    st.write('Mean absolute forecast error (gCO₂/kWh) by lead time in hours - Last 30 Days:')
+    st.bar_chart(error_df, x='lead_hours', y='mean_abs_error')
+
 # --- Data Statistics and Filtering Section ---
 st.header('📅 Select Date Range and View Data')
 
 # Filter data based on selected date range
-min_date = carbon_df['from'].min()
-max_date = carbon_df['from'].max()
+min_date = carbon_df['from'].iloc[-1]
+max_date = carbon_df['from'].iloc[0]
 
 # Streamlit slider for date range selection
 selected_dates = st.slider('Select the date range:', 
@@ -291,11 +587,79 @@ selected_dates = st.slider('Select the date range:',
 # Filter DataFrame based on selected date range
 start_date = pd.to_datetime(selected_dates[0]).tz_convert('UTC')
 end_date = pd.to_datetime(selected_dates[1]).tz_convert('UTC')
-filtered_carbon_df = carbon_df[(carbon_df['from'] >= start_date) & (carbon_df['from'] <= end_date)]
-
-# Display filtered data
-st.write(filtered_carbon_df)
+filtered_carbon_df = get_range_slice(carbon_df, start_date, end_date)
+
+# Display filtered data one page at a time, sorted on the server
+st.caption(f'{len(filtered_carbon_df):,} rows in the selected range')
+col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+with col1:
+    sort_column = st.selectbox('Sort by', list(filtered_carbon_df.columns),
+                               index=list(filtered_carbon_df.columns).index('from'))
+with col2:
+    sort_ascending = st.selectbox('Order', ['Descending', 'Ascending']) == 'Ascending'
+with col3:
+    page_size = st.selectbox('Rows per page', TABLE_PAGE_SIZES)
+with col4:
+    page_count = max(1, math.ceil(len(filtered_carbon_df) / page_size))
+    page = st.number_input(f'Page (of {page_count})', min_value=1, max_value=page_count, value=1)
+
+# Check the session's memory budget before sorting: frames built for this
+# session so far plus the sorted copy of the column the table needs
+session_budget_bytes = SESSION_MEMORY_BUDGET_MB * 1024 * 1024
+session_bytes = get_session_memory_bytes([lowest_periods, believed_df, error_df])
+table_sort_column, sort_bytes = fit_table_sort(filtered_carbon_df, sort_column, session_budget_bytes - session_bytes)
+if table_sort_column != sort_column:
+    st.warning(f'⚠️ Sorting this range by {sort_column} would go over the {SESSION_MEMORY_BUDGET_MB} MB '
+               f'per-session memory budget, so it is shown in time order. Try a shorter date range.')
+
+table_page_df = get_table_page(filtered_carbon_df, table_sort_column, sort_ascending, page, page_size)
+session_bytes += sort_bytes + get_session_memory_bytes([table_page_df])
+st.dataframe(table_page_df, hide_index=True)
+
+# Export the selected range, written to disk in chunks only when requested
+export_format = st.radio('Export format', ['csv', 'parquet'], horizontal=True,
+                         format_func=lambda file_format: file_format.upper())
+export_key = (start_date, end_date, export_format, st.session_state.get('data_version'))
+
+# Drop an export made for a different range, format or data version
+export = st.session_state.get('export')
+if export is not None and (export.key != export_key or not os.path.exists(export.path)):
+    export.remove()
+    del st.session_state['export']
+    export = None
+
+if st.button('Prepare export'):
+    if export is not None:
+        export.remove()
+    remove_stale_exports(EXPORTS_DIRNAME)
+
+    # Size the export chunks to fit what is left of the session's memory budget
+    export_chunk_rows = get_export_chunk_rows(filtered_carbon_df, session_budget_bytes - session_bytes)
+    session_bytes += export_chunk_rows * estimate_row_bytes(filtered_carbon_df)
+
+    with st.spinner('Writing export...'):
+        export = st.session_state['export'] = ExportFile(
+            export_key, write_export_file(filtered_carbon_df, export_format, EXPORTS_DIRNAME, export_chunk_rows))
+
+# Link to the file so the browser downloads it from disk rather than through session memory
+if export is not None:
+    export_file_name = f'carbon_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{export_format}'
+    st.markdown(f'<a href="{EXPORTS_URL}/{Path(export.path).name}" download="{export_file_name}">'
+                f'⬇️ Download {export_format.upper()}</a>', unsafe_allow_html=True)
 
 # Display summary statistics for filtered data
 st.header('📈 Carbon Intensity Statistics')
-st.write(filtered_carbon_df.describe())
+stats_df = filtered_carbon_df.describe()
+session_bytes += get_session_memory_bytes([stats_df])
+st.write(stats_df)
+
+# --- Startup timings ---
+_startup_report = (f"Imports {startup_timings['imports'] * 1000:.0f} ms · "
+                   f"first paint {startup_timings['first_paint'] * 1000:.0f} ms · "
+                   f"data load {startup_timings['data_load'] * 1000:.0f} ms "
+                   f"({'snapshot' if FAST_START else 'CSV'} mode) · "
+                   f"session memory {session_bytes / 1024 / 1024:.1f} of {SESSION_MEMORY_BUDGET_MB} MB")
+if not startup_timings.get('logged'):
+    startup_timings['logged'] = True
+    print(f'Startup: {_startup_report}')
+st.caption(f'⏱️ {_startup_report}')
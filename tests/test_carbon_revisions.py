@@ -0,0 +1,78 @@
+import pandas as pd
+
+from carbon_revisions import get_forecast_error_by_lead_time, get_forecasts_as_of, record_forecast_revisions
+
+SLOT = pd.Timestamp('2024-06-01T12:00Z')
+
+def entry(slot, forecast, wind=40):
+    return {
+        'from': slot.strftime('%Y-%m-%dT%H:%MZ'),
+        'to': (slot + pd.Timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%MZ'),
+        'intensity': {'forecast': forecast, 'index': 'moderate'},
+        'generationmix': [{'fuel': 'gas', 'perc': 100 - wind}, {'fuel': 'wind', 'perc': wind}],
+    }
+
+# Poll the slot every 30 minutes from hours_before the slot until it starts,
+# using forecast_at(hours_to_slot) for the value seen at each poll
+def poll(filename, forecast_at, hours_before=48):
+    for half_hours in range(hours_before * 2, -1, -1):
+        hours_to_slot = half_hours / 2
+        record_forecast_revisions(filename, [entry(SLOT, forecast_at(hours_to_slot))],
+                                  SLOT - pd.Timedelta(hours=hours_to_slot))
+
+def test_unchanged_polls_store_one_version(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    assert record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT - pd.Timedelta(hours=2)) == 1
+    assert record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT - pd.Timedelta(hours=1)) == 0
+    assert record_forecast_revisions(filename, [entry(SLOT, 200, wind=50)], SLOT) == 1
+
+def test_forecasts_as_of(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    poll(filename, lambda hours_to_slot: 250 if hours_to_slot > 6 else 200, hours_before=12)
+
+    for hours_before, expected in [(12, 250), (7, 250), (6, 200), (0, 200)]:
+        as_of = SLOT - pd.Timedelta(hours=hours_before)
+        df = get_forecasts_as_of(filename, as_of, SLOT, SLOT)
+        assert df['forecast'].tolist() == [expected]
+        assert df['from'].tolist() == [SLOT]
+        assert df['wind'].tolist() == [40]
+
+    # Nothing was known before the first poll
+    assert get_forecasts_as_of(filename, SLOT - pd.Timedelta(hours=13), SLOT, SLOT).empty
+
+def test_accurate_forecast_counts_at_every_lead_time(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    poll(filename, lambda hours_to_slot: 200)
+
+    df = get_forecast_error_by_lead_time(filename, SLOT, SLOT)
+    assert df['lead_hours'].tolist() == list(range(1, 49))
+    assert (df['samples'] == 1).all()
+    assert (df['mean_abs_error'] == 0).all()
+
+def test_error_uses_version_current_at_each_lead_time(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    poll(filename, lambda hours_to_slot: 260 if hours_to_slot > 24 else 220 if hours_to_slot > 3 else 200)
+
+    errors = get_forecast_error_by_lead_time(filename, SLOT, SLOT).set_index('lead_hours')['mean_error']
+    assert errors[48] == 60
+    assert errors[25] == 60
+    assert errors[24] == 20
+    assert errors[4] == 20
+    assert errors[3] == 0
+    assert errors[1] == 0
+
+def test_lead_times_without_polls_are_skipped(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    record_forecast_revisions(filename, [entry(SLOT, 250)], SLOT - pd.Timedelta(hours=48))
+    record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT - pd.Timedelta(hours=2))
+    record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT)
+
+    df = get_forecast_error_by_lead_time(filename, SLOT, SLOT, max_gap_seconds=1800)
+    assert df['lead_hours'].tolist() == [1, 2, 48]
+
+def test_slot_not_seen_after_it_started_has_no_outturn(tmp_path):
+    filename = tmp_path / 'revisions.sqlite'
+    record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT - pd.Timedelta(hours=2))
+    record_forecast_revisions(filename, [entry(SLOT, 200)], SLOT - pd.Timedelta(hours=1))
+
+    assert get_forecast_error_by_lead_time(filename, SLOT, SLOT).empty
@@ -0,0 +1,74 @@
+import os
+
+import pandas as pd
+
+from carbon_snapshot import (append_carbon_snapshot, build_carbon_snapshot, compact_carbon_snapshot,
+                             get_segment_filenames, load_carbon_snapshot, snapshot_is_fresh)
+
+START = pd.Timestamp('2024-01-01T00:00Z')
+
+def slots(first, count):
+    frm = pd.date_range(START + pd.Timedelta(minutes=30 * first), periods=count, freq='30min')
+    return pd.DataFrame({'from': frm, 'to': frm + pd.Timedelta(minutes=30)})
+
+def write_csv(filename, count):
+    df = slots(0, count).assign(forecast=100, index='moderate', gas=60.0, wind=40.0)
+    df.to_csv(filename, index=False)
+
+def test_build_from_csv_is_newest_first(tmp_path):
+    csv_filename = tmp_path / 'carbon.csv'
+    snapshot_filename = tmp_path / 'carbon.arrow'
+    write_csv(csv_filename, 10)
+
+    build_carbon_snapshot(csv_filename, snapshot_filename)
+    df = load_carbon_snapshot(snapshot_filename).to_pandas()
+    assert len(df) == 10
+    assert df['from'].is_monotonic_decreasing
+
+def test_freshness_uses_segment_mtimes(tmp_path):
+    csv_filename = tmp_path / 'carbon.csv'
+    snapshot_filename = tmp_path / 'carbon.arrow'
+    assert not snapshot_is_fresh(snapshot_filename, csv_filename)
+
+    write_csv(csv_filename, 10)
+    build_carbon_snapshot(csv_filename, snapshot_filename)
+    os.utime(snapshot_filename, (1_000, 1_000))
+    os.utime(csv_filename, (2_000, 2_000))
+    assert not snapshot_is_fresh(snapshot_filename, csv_filename)
+
+    append_carbon_snapshot(slots(10, 2).assign(forecast=100, index='low'), snapshot_filename)
+    os.utime(get_segment_filenames(snapshot_filename)[0], (3_000, 3_000))
+    assert snapshot_is_fresh(snapshot_filename, csv_filename)
+
+def test_segments_load_newest_first_with_promoted_schema(tmp_path):
+    csv_filename = tmp_path / 'carbon.csv'
+    snapshot_filename = tmp_path / 'carbon.arrow'
+    write_csv(csv_filename, 10)
+    build_carbon_snapshot(csv_filename, snapshot_filename)
+
+    # Reordered columns, float forecasts and a fuel the snapshot doesn't have
+    append_carbon_snapshot(slots(10, 4).assign(coal=1.0, index='low', forecast=90.5), snapshot_filename)
+    append_carbon_snapshot(slots(14, 4).assign(forecast=80, index='low', wind=50.0), snapshot_filename)
+
+    df = load_carbon_snapshot(snapshot_filename).to_pandas()
+    assert len(df) == 18
+    assert df['from'].is_monotonic_decreasing
+    assert df['forecast'].tolist()[:8] == [80] * 4 + [90.5] * 4
+    assert df['coal'].notna().sum() == 4
+    assert df['gas'].notna().sum() == 10
+
+def test_compaction_folds_segments_into_snapshot(tmp_path):
+    csv_filename = tmp_path / 'carbon.csv'
+    snapshot_filename = tmp_path / 'carbon.arrow'
+    write_csv(csv_filename, 10)
+    build_carbon_snapshot(csv_filename, snapshot_filename)
+    for i in range(21):
+        append_carbon_snapshot(slots(10 + i, 1).assign(forecast=i, index='low'), snapshot_filename)
+    before = load_carbon_snapshot(snapshot_filename).to_pandas()
+
+    compact_carbon_snapshot(snapshot_filename, max_segments=21)
+    assert len(get_segment_filenames(snapshot_filename)) == 21
+
+    compact_carbon_snapshot(snapshot_filename, max_segments=20)
+    assert get_segment_filenames(snapshot_filename) == []
+    pd.testing.assert_frame_equal(load_carbon_snapshot(snapshot_filename).to_pandas(), before)
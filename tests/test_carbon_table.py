@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carbon_table import (estimate_table_sort_bytes, fit_table_sort, get_export_chunk_rows, get_range_slice,
+                          get_table_page, write_export_file)
+
+START = pd.Timestamp('2024-01-01T00:00Z')
+
+# A newest-first frame like the shared dataset, with a string index column
+# and NaNs in one of the fuel columns
+def carbon_frame(count=10):
+    frm = pd.date_range(START, periods=count, freq='30min')[::-1]
+    df = pd.DataFrame({
+        'from': frm,
+        'to': frm + pd.Timedelta(minutes=30),
+        'forecast': np.arange(count)[::-1] * 10,
+        'index': pd.array(['low', 'moderate'] * (count // 2), dtype='string'),
+        'wind': [float(i) if i % 3 else np.nan for i in range(count)],
+    })
+    return df
+
+def slot(i):
+    return START + pd.Timedelta(minutes=30 * i)
+
+def test_range_slice_includes_both_edges():
+    df = carbon_frame()
+    sliced = get_range_slice(df, slot(2), slot(5))
+    assert sliced['from'].tolist() == [slot(5), slot(4), slot(3), slot(2)]
+
+def test_range_slice_between_slots_and_outside_data():
+    df = carbon_frame()
+    half_slot = pd.Timedelta(minutes=15)
+    assert get_range_slice(df, slot(2) + half_slot, slot(4) - half_slot)['from'].tolist() == [slot(3)]
+    assert get_range_slice(df, slot(-5), slot(0))['from'].tolist() == [slot(0)]
+    assert get_range_slice(df, slot(9), slot(20))['from'].tolist() == [slot(9)]
+    assert get_range_slice(df, slot(20), slot(30)).empty
+
+def test_range_slice_accepts_other_timezones():
+    df = carbon_frame()
+    start = slot(2).tz_convert('Europe/London').to_pydatetime()
+    assert get_range_slice(df, start, slot(2))['from'].tolist() == [slot(2)]
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_pages_by_from(ascending):
+    df = carbon_frame()
+    pages = [get_table_page(df, 'from', ascending, page, 4) for page in (1, 2, 3)]
+    assert [len(page) for page in pages] == [4, 4, 2]
+    combined = pd.concat(pages)['from'].tolist()
+    assert combined == sorted(df['from'], reverse=not ascending)
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_pages_by_column_with_nans_put_nans_last(ascending):
+    df = carbon_frame()
+    pages = pd.concat([get_table_page(df, 'wind', ascending, page, 3) for page in (1, 2, 3, 4)])
+    values = pages['wind'].tolist()
+    known = [value for value in values if not np.isnan(value)]
+    assert len(values) == len(df)
+    assert known == sorted(known, reverse=not ascending)
+    assert all(np.isnan(value) for value in values[len(known):])
+
+@pytest.mark.parametrize('sort_column', list(carbon_frame().columns))
+def test_every_column_can_be_estimated_and_sorted(sort_column):
+    df = carbon_frame()
+    assert estimate_table_sort_bytes(df, sort_column) >= 0
+    for ascending in (False, True):
+        assert len(get_table_page(df, sort_column, ascending, 1, 5)) == 5
+
+def test_sort_by_from_costs_nothing():
+    assert estimate_table_sort_bytes(carbon_frame(), 'from') == 0
+
+def test_sort_falls_back_to_from_when_over_budget():
+    df = carbon_frame()
+    sort_bytes = estimate_table_sort_bytes(df, 'forecast')
+    assert sort_bytes > 0
+    assert fit_table_sort(df, 'forecast', sort_bytes) == ('forecast', sort_bytes)
+    assert fit_table_sort(df, 'forecast', sort_bytes - 1) == ('from', 0)
+    assert fit_table_sort(df, 'from', 0) == ('from', 0)
+
+def test_export_chunk_rows_stay_within_limits():
+    df = carbon_frame()
+    assert get_export_chunk_rows(df, 0) == 1_000
+    assert get_export_chunk_rows(df, 10 ** 12) == 50_000
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_chunked_export_round_trip(tmp_path, file_format):
+    df = carbon_frame(26)
+    filename = write_export_file(df, file_format, tmp_path / 'exports', chunk_rows=4)
+
+    if file_format == 'csv':
+        exported = pd.read_csv(filename, parse_dates=['from', 'to'])
+        assert exported['index'].tolist() == df['index'].tolist()
+        assert exported['forecast'].tolist() == df['forecast'].tolist()
+        assert exported['from'].tolist() == df['from'].tolist()
+        assert exported['wind'].isna().tolist() == df['wind'].isna().tolist()
+    else:
+        exported = pd.read_parquet(filename)
+        pd.testing.assert_frame_equal(exported, df, check_dtype=False)